@@ -17,8 +17,11 @@ Date: 2025-07-04
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import pandas as pd
+import numpy as np
 import re
 import time
 from urllib.parse import urljoin
@@ -28,17 +31,53 @@ import logging
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import json
+import gc
+import copy
+from functools import lru_cache
 from database import AutoScoutDatabase
 
+# Optional: Parquet-Unterstützung für die Preishistorie im CSV-Modus
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Vorkompilierte Muster für das Parsen der einzelnen Listings (laufen pro Artikel)
+_POWER_RE = re.compile(r'(\d+)\s*kW\s*\((\d+)\s*(?:CH|PS)\)')
+_TITLE_CLASS_RE = re.compile(r'.*title.*')
+_SELLER_INFO_CLASS_RE = re.compile(r'.*SellerInfo.*')
+_HREF_SPLIT_RE = re.compile(r'[/?#&=]')
+_DIGIT_RE = re.compile(r'\d')
+
 
 class AutoScout24LuxembourgScraper:
     """
     Hauptklasse für das Scraping von AutoScout24.lu mit Preisänderungs-Tracking
     """
     
+    # Gemeinsame HTTP-Session für alle Instanzen (Keep-Alive über mehrere Modelle)
+    _shared_session = None
+    
+    SESSION_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'de-DE,de;q=0.8,en-US;q=0.5,en;q=0.3',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+        'Cache-Control': 'max-age=0',
+    }
+    
+    # Formatierung für Preisangaben in Zusammenfassungen
+    PRICE_FORMAT = '€{:,.0f}'
+    
+    # Spalten bestehender Listings, die für die Preisänderungserkennung benötigt werden
+    PRICE_CHECK_COLUMNS = ('listing_id', 'price', 'scraped_date')
+    
     def __init__(self, make: str, model: str, sort: str = "standard", 
                  desc: int = 0, ustate: str = "N,U", atype: str = "C",
-                 data_dir: str = "data", use_database: bool = True):
+                 data_dir: str = "data", use_database: bool = True,
+                 export_csv_history: bool = False):
         """
         Initialisiert den Scraper
         
@@ -51,6 +90,7 @@ class AutoScout24LuxembourgScraper:
             atype: Fahrzeugtyp ("C" für PKW)
             data_dir: Verzeichnis für Datenfiles
             use_database: Verwendung der SQLite-Datenbank (Standard: True)
+            export_csv_history: Preishistorie im CSV-Modus zusätzlich als CSV speichern
         """
         self.make = make
         self.model = model
@@ -60,6 +100,7 @@ class AutoScout24LuxembourgScraper:
         self.atype = atype
         self.data_dir = Path(data_dir)
         self.use_database = use_database
+        self.export_csv_history = export_csv_history
         
         # Verzeichnis erstellen falls nicht vorhanden
         self.data_dir.mkdir(exist_ok=True)
@@ -76,41 +117,76 @@ class AutoScout24LuxembourgScraper:
             self.database = None
             self.logger.info("CSV-Modus aktiviert (keine Datenbank)")
         
+        # Memoisierte Datenbankabfragen (werden nach Schreibzugriffen geleert)
+        if self.database:
+            self._cached_vehicle_models = lru_cache(maxsize=1)(self.database.get_all_vehicle_models)
+        
+        # Statistiken je (make, model); nur erfolgreiche Ergebnisse (Fehler liefern {})
+        self._statistics_cache = {}
+        
         # Basis URL für Luxembourg
         self.base_url = (
             "https://www.autoscout24.lu/lst/{}/{}?"
             "sort={}&desc={}&ustate={}&atype={}&cy=L&source=homepage_search-mask"
         )
         
-        # Session für HTTP-Requests
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'de-DE,de;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Cache-Control': 'max-age=0',
-        })
+        # Gemeinsame Session für HTTP-Requests (Connection-Pool wird wiederverwendet)
+        self.session = type(self)._get_shared_session()
         
         # Legacy CSV-Dateinamen (für Kompatibilität)
         self.csv_filename = self.data_dir / f"{make}_{model}_listings.csv"
         self.price_history_filename = self.data_dir / f"{make}_{model}_price_history.csv"
+        self.price_history_parquet_filename = self.data_dir / f"{make}_{model}_price_history.parquet"
         self.metadata_filename = self.data_dir / f"{make}_{model}_metadata.json"
         
+        # Zuletzt gemessene Serverantwortzeit in Millisekunden (None = noch keine Messung)
+        self._last_response_time_ms = None
+        
         # DataFrame für aktuelle Listings (temporär)
         self.current_listings = pd.DataFrame()
         
         # DataFrame für Preishistorie (temporär)
         self.price_history = pd.DataFrame()
         
+        # Zwischengespeicherte Preiszusammenfassung: (DataFrame, summary)
+        self._price_summary_cache = None
+        
         self.logger.info(f"Scraper initialisiert für {make} {model}")
         
+    @classmethod
+    def _get_shared_session(cls) -> requests.Session:
+        """Gibt die gemeinsame HTTP-Session zurück und erstellt sie bei Bedarf"""
+        if cls._shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=32,
+                pool_maxsize=32,
+                max_retries=Retry(total=3, backoff_factor=0.5)
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(cls.SESSION_HEADERS)
+            cls._shared_session = session
+        return cls._shared_session
+    
+    @classmethod
+    def shutdown_session(cls):
+        """Schließt die gemeinsame HTTP-Session (einmal nach dem letzten Scraping-Lauf)"""
+        if cls._shared_session is not None:
+            cls._shared_session.close()
+            cls._shared_session = None
+
     def __del__(self):
         """Destruktor - schließt Datenbankverbindung"""
         if hasattr(self, 'database') and self.database:
             self.database.close()
 
+    def _clear_query_cache(self):
+        """Leert die memoisierten Datenbankabfragen nach Schreibzugriffen"""
+        if self.database:
+            self._cached_vehicle_models.cache_clear()
+        self._statistics_cache.clear()
+
     def _setup_logging(self):
         """Richtet das Logging ein - nur Console-Output"""
         # Erstelle logs Verzeichnis für Summary-Dateien
@@ -263,9 +339,9 @@ class AutoScout24LuxembourgScraper:
                     href = link_for_id.get('href')
                     if href:
                         # nehme letzten Pfadteil oder query param
-                        href_parts = re.split(r'[/?#&=]', href)
+                        href_parts = _HREF_SPLIT_RE.split(href)
                         for part in reversed(href_parts):
-                            if part and re.search(r'\d', part):
+                            if part and _DIGIT_RE.search(part):
                                 listing_id = part
                                 break
 
@@ -303,7 +379,7 @@ class AutoScout24LuxembourgScraper:
             url = None
 
             # 1) Link mit Klassen-Pattern
-            title_link = article_soup.find('a', class_=re.compile(r'.*title.*'))
+            title_link = article_soup.find('a', class_=_TITLE_CLASS_RE)
             if title_link and title_link.get_text(strip=True):
                 title = title_link.get_text(strip=True)
                 url = title_link.get('href')
@@ -336,7 +412,7 @@ class AutoScout24LuxembourgScraper:
             power_elem = article_soup.find('span', {'data-testid': 'VehicleDetails-speedometer'})
             if power_elem:
                 power_text = power_elem.get_text(strip=True)
-                power_match = re.search(r'(\d+)\s*kW\s*\((\d+)\s*(?:CH|PS)\)', power_text)
+                power_match = _POWER_RE.search(power_text)
                 if power_match:
                     data["power"] = f"{power_match.group(1)} kW ({power_match.group(2)} PS)"
             
@@ -347,7 +423,7 @@ class AutoScout24LuxembourgScraper:
                 data["transmission"] = self._convert_transmission(trans_text)
             
             # Standort
-            location_elem = article_soup.find('span', class_=re.compile(r'.*SellerInfo.*'))
+            location_elem = article_soup.find('span', class_=_SELLER_INFO_CLASS_RE)
             if location_elem:
                 location_text = location_elem.get_text(strip=True)
                 data["location"] = location_text
@@ -417,6 +493,7 @@ class AutoScout24LuxembourgScraper:
             response = self.session.get(first_url, timeout=15)
             response.raise_for_status()
             response_time = time.time() - start_time
+            self._last_response_time_ms = response_time * 1000
             
             # Adaptive Verzögerung basierend auf Serverantwortzeit
             if adaptive_delay:
@@ -479,6 +556,7 @@ class AutoScout24LuxembourgScraper:
                     response = self.session.get(page_url, timeout=15)
                     response.raise_for_status()
                     response_time = time.time() - start_time
+                    self._last_response_time_ms = response_time * 1000
                     
                     # Adaptive Verzögerung anpassen
                     if adaptive_delay:
@@ -538,6 +616,28 @@ class AutoScout24LuxembourgScraper:
         
         return self.current_listings
 
+    def _read_price_history_file(self) -> pd.DataFrame:
+        """Liest die Preishistorie im CSV-Modus (Parquet bevorzugt, CSV als Fallback)"""
+        if PARQUET_AVAILABLE and self.price_history_parquet_filename.exists():
+            return pd.read_parquet(self.price_history_parquet_filename, engine='pyarrow')
+        if self.price_history_filename.exists():
+            return pd.read_csv(self.price_history_filename)
+        return pd.DataFrame()
+    
+    def _write_price_history_file(self):
+        """Schreibt die Preishistorie im CSV-Modus als Parquet (CSV nur optional)"""
+        if PARQUET_AVAILABLE:
+            self.price_history.to_parquet(
+                self.price_history_parquet_filename,
+                engine='pyarrow', compression='zstd', index=False
+            )
+            self.logger.info(f"Preishistorie gespeichert: {self.price_history_parquet_filename}")
+        
+        # Lesbare CSV-Kopie nur auf Wunsch (oder falls pyarrow fehlt)
+        if self.export_csv_history or not PARQUET_AVAILABLE:
+            self.price_history.to_csv(self.price_history_filename, index=False)
+            self.logger.info(f"Preishistorie gespeichert: {self.price_history_filename}")
+
     def load_existing_data(self) -> tuple:
         """Lädt bestehende Daten aus der Datenbank oder CSV-Dateien"""
         existing_listings = pd.DataFrame()
@@ -546,7 +646,9 @@ class AutoScout24LuxembourgScraper:
         if self.use_database and self.database:
             # Lade aus SQLite-Datenbank
             try:
-                existing_listings = self.database.get_existing_listings(self.make, self.model)
+                existing_listings = self.database.get_existing_listings(
+                    self.make, self.model, columns=self.PRICE_CHECK_COLUMNS
+                )
                 existing_price_history = self.database.get_price_history(self.make, self.model)
                 
                 self.logger.info(
@@ -565,12 +667,12 @@ class AutoScout24LuxembourgScraper:
                 except Exception as e:
                     self.logger.error(f"Fehler beim Laden bestehender Listings: {e}")
             
-            if self.price_history_filename.exists():
-                try:
-                    existing_price_history = pd.read_csv(self.price_history_filename)
-                    self.logger.info(f"Preishistorie aus CSV geladen: {len(existing_price_history)} Einträge")
-                except Exception as e:
-                    self.logger.error(f"Fehler beim Laden der Preishistorie: {e}")
+            try:
+                existing_price_history = self._read_price_history_file()
+                if not existing_price_history.empty:
+                    self.logger.info(f"Preishistorie geladen: {len(existing_price_history)} Einträge")
+            except Exception as e:
+                self.logger.error(f"Fehler beim Laden der Preishistorie: {e}")
         
         return existing_listings, existing_price_history
 
@@ -583,43 +685,64 @@ class AutoScout24LuxembourgScraper:
         
         # Merge auf listing_id
         merged = self.current_listings.merge(
-            existing_listings[['listing_id', 'price', 'scraped_date']], 
+            existing_listings[list(self.PRICE_CHECK_COLUMNS)], 
             on='listing_id', 
             suffixes=('_new', '_old'),
             how='inner'
         )
         
-        for _, row in merged.iterrows():
-            try:
-                price_new = float(row['price_new']) if pd.notna(row['price_new']) else None
-                price_old = float(row['price_old']) if pd.notna(row['price_old']) else None
-                
-                if price_new and price_old and price_new != price_old:
-                    change = {
-                        'listing_id': row['listing_id'],
-                        'title': row['title'],
-                        'price_old': price_old,
-                        'price_new': price_new,
-                        'price_difference': price_new - price_old,
-                        'price_change_percent': ((price_new - price_old) / price_old) * 100,
-                        'change_date': datetime.now().isoformat(),
-                        'change_timestamp': int(time.time()),
-                        'last_seen': row['scraped_date_old']
-                    }
-                    
-                    change_type = "PREIS_GESUNKEN" if price_new < price_old else "PREIS_GESTIEGEN"
-                    change['change_type'] = change_type;
-                    
-                    price_changes.append(change);
-                    
-                    self.logger.info(
-                        f"{change_type}: {row['title']} - "
-                        f"€{price_old:,.0f} → €{price_new:,.0f} "
-                        f"({change['price_change_percent']:+.1f}%)"
-                    )
-                    
-            except (ValueError, TypeError) as e:
-                self.logger.warning(f"Preisvergleich fehlgeschlagen für listing_id {row['listing_id']}: {e}")
+        if merged.empty:
+            return price_changes
+        
+        # Preise vektorisiert vergleichen statt Zeile für Zeile
+        price_new = pd.to_numeric(merged['price_new'], errors='coerce')
+        price_old = pd.to_numeric(merged['price_old'], errors='coerce')
+        
+        unparsable = (
+            (merged['price_new'].notna() & price_new.isna())
+            | (merged['price_old'].notna() & price_old.isna())
+        )
+        for listing_id in merged.loc[unparsable, 'listing_id']:
+            self.logger.warning(f"Preisvergleich fehlgeschlagen für listing_id {listing_id}: ungültiger Preis")
+        
+        # Nur gültige Preise ungleich 0, die sich geändert haben
+        changed = (price_new.fillna(0) != 0) & (price_old.fillna(0) != 0) & (price_new != price_old)
+        if not changed.any():
+            return price_changes
+        
+        changed_rows = merged.loc[changed]
+        new_values = price_new[changed].to_numpy(dtype=np.float64)
+        old_values = price_old[changed].to_numpy(dtype=np.float64)
+        differences = new_values - old_values
+        percents = differences / old_values * 100
+        
+        change_date = datetime.now().isoformat()
+        change_timestamp = int(time.time())
+        
+        for listing_id, title, last_seen, old, new, difference, percent in zip(
+            changed_rows['listing_id'].tolist(), changed_rows['title'].tolist(),
+            changed_rows['scraped_date_old'].tolist(), old_values.tolist(),
+            new_values.tolist(), differences.tolist(), percents.tolist()
+        ):
+            change_type = "PREIS_GESUNKEN" if new < old else "PREIS_GESTIEGEN"
+            price_changes.append({
+                'listing_id': listing_id,
+                'title': title,
+                'price_old': old,
+                'price_new': new,
+                'price_difference': difference,
+                'price_change_percent': percent,
+                'change_date': change_date,
+                'change_timestamp': change_timestamp,
+                'last_seen': last_seen,
+                'change_type': change_type
+            })
+            
+            self.logger.info(
+                f"{change_type}: {title} - "
+                f"€{old:,.0f} → €{new:,.0f} "
+                f"({percent:+.1f}%)"
+            )
         
         return price_changes
 
@@ -632,6 +755,7 @@ class AutoScout24LuxembourgScraper:
             # Speichere in SQLite-Datenbank
             try:
                 self.database.insert_price_changes(price_changes, self.make, self.model)
+                self._clear_query_cache()
                 
                 # Lade aktualisierte Preishistorie für temporäres DataFrame
                 self.price_history = self.database.get_price_history(self.make, self.model)
@@ -642,14 +766,14 @@ class AutoScout24LuxembourgScraper:
             # Legacy CSV-Modus
             new_history_df = pd.DataFrame(price_changes)
             
-            if self.price_history_filename.exists():
-                try:
-                    existing_history = pd.read_csv(self.price_history_filename)
-                    self.price_history = pd.concat([existing_history, new_history_df], ignore_index=True)
-                except Exception as e:
-                    self.logger.error(f"Fehler beim Laden der Preishistorie: {e}")
+            try:
+                existing_history = self._read_price_history_file()
+                if existing_history.empty:
                     self.price_history = new_history_df
-            else:
+                else:
+                    self.price_history = pd.concat([existing_history, new_history_df], ignore_index=True)
+            except Exception as e:
+                self.logger.error(f"Fehler beim Laden der Preishistorie: {e}")
                 self.price_history = new_history_df
 
     def save_data(self):
@@ -661,31 +785,31 @@ class AutoScout24LuxembourgScraper:
                 # Speichere in SQLite-Datenbank
                 new_listings_count = 0
                 
-                if not self.current_listings.empty:
-                    # Konvertiere DataFrame zu Liste von Dictionaries
-                    listings_data = self.current_listings.to_dict('records')
+                # Listings, Inaktiv-Markierung und Metadaten in einer Transaktion speichern
+                with self.database.transaction():
+                    if not self.current_listings.empty:
+                        # Speichere Listings direkt aus dem DataFrame in der Datenbank
+                        new_listings_count = self.database.insert_listings_df(
+                            self.current_listings, self.make, self.model
+                        )
+                        
+                        # Markiere nicht mehr verfügbare Listings als inaktiv
+                        current_listing_ids = self.current_listings['listing_id'].tolist()
+                        self.database.mark_listings_inactive(self.make, self.model, current_listing_ids)
+                        
+                        self.logger.info(f"Listings in Datenbank gespeichert: {len(self.current_listings)}")
                     
-                    # Speichere Listings in Datenbank
-                    new_listings_count = self.database.insert_listings(
-                        listings_data, self.make, self.model
+                    # Aktualisiere Metadaten
+                    price_changes_count = len(self.price_history) if not self.price_history.empty else 0
+                    self.database.update_metadata(
+                        self.make, self.model,
+                        total_listings=len(self.current_listings),
+                        new_listings=new_listings_count,
+                        price_changes=price_changes_count,
+                        status='success',
+                        scraper_version='2.0'
                     )
-                    
-                    # Markiere nicht mehr verfügbare Listings als inaktiv
-                    current_listing_ids = self.current_listings['listing_id'].tolist()
-                    self.database.mark_listings_inactive(self.make, self.model, current_listing_ids)
-                    
-                    self.logger.info(f"Listings in Datenbank gespeichert: {len(self.current_listings)}")
-                
-                # Aktualisiere Metadaten
-                price_changes_count = len(self.price_history) if not self.price_history.empty else 0
-                self.database.update_metadata(
-                    self.make, self.model,
-                    total_listings=len(self.current_listings),
-                    new_listings=new_listings_count,
-                    price_changes=price_changes_count,
-                    status='success',
-                    scraper_version='2.0'
-                )
+                self._clear_query_cache()
                 
                 # Optional: Exportiere auch zu CSV für Frontend-Kompatibilität
                 self.database.export_to_csv(self.make, self.model, str(self.data_dir))
@@ -700,8 +824,7 @@ class AutoScout24LuxembourgScraper:
                     self.logger.info(f"Aktuelle Listings gespeichert: {self.csv_filename}")
                 
                 if not self.price_history.empty:
-                    self.price_history.to_csv(self.price_history_filename, index=False)
-                    self.logger.info(f"Preishistorie gespeichert: {self.price_history_filename}")
+                    self._write_price_history_file()
                 
                 # Speichere Metadata
                 metadata = {
@@ -742,9 +865,9 @@ class AutoScout24LuxembourgScraper:
         if max_pages is None:
             self.logger.info("🔍 Automatische Seitenerkennung aktiviert")
         else:
-            self.logger.info(f"📄 Maximale Seiten: {max_pages}")
+            self.logger.info("📄 Maximale Seiten: %s", max_pages)
             
-        self.logger.info(f"⚙️  Stop-on-Empty: {stop_on_empty}, Adaptive-Delay: {adaptive_delay}")
+        self.logger.info("⚙️  Stop-on-Empty: %s, Adaptive-Delay: %s", stop_on_empty, adaptive_delay)
         
         try:
             # 0. Lösche alte Summary-Dateien vor dem neuen Lauf
@@ -769,21 +892,26 @@ class AutoScout24LuxembourgScraper:
             price_changes = self.detect_price_changes(existing_listings)
             
             if price_changes:
-                self.logger.info(f"🔄 {len(price_changes)} Preisänderungen erkannt!")
+                self.logger.info("🔄 %d Preisänderungen erkannt!", len(price_changes))
                 
                 # 4. Aktualisiere Preishistorie
                 self.update_price_history(price_changes)
                 
-                # 5. Zeige Zusammenfassung der Änderungen
-                price_drops = [c for c in price_changes if c['price_difference'] < 0]
-                price_increases = [c for c in price_changes if c['price_difference'] > 0]
+                # 5. Zeige Zusammenfassung der Änderungen (vektorisiert)
+                diffs = np.fromiter(
+                    (c['price_difference'] for c in price_changes),
+                    dtype=np.float64, count=len(price_changes)
+                )
+                drops_mask = diffs < 0
+                n_drops = int(drops_mask.sum())
+                n_increases = int((diffs > 0).sum())
                 
-                self.logger.info(f"📉 Preissenkungen: {len(price_drops)}")
-                self.logger.info(f"📈 Preiserhöhungen: {len(price_increases)}")
+                self.logger.info("📉 Preissenkungen: %d", n_drops)
+                self.logger.info("📈 Preiserhöhungen: %d", n_increases)
                 
-                if price_drops:
-                    avg_drop = sum(c['price_difference'] for c in price_drops) / len(price_drops)
-                    self.logger.info(f"💰 Durchschnittliche Preissenkung: €{abs(avg_drop):,.0f}")
+                if n_drops and self.logger.isEnabledFor(logging.INFO):
+                    avg_drop = float(np.abs(diffs[drops_mask]).mean())
+                    self.logger.info(f"💰 Durchschnittliche Preissenkung: €{avg_drop:,.0f}")
             else:
                 self.logger.info("ℹ️  Keine Preisänderungen erkannt")
             
@@ -794,47 +922,54 @@ class AutoScout24LuxembourgScraper:
             duration = time.time() - start_time
             unique_listings = len(current_listings['listing_id'].unique()) if not current_listings.empty else 0
             
-            self.logger.info(f"✅ Intelligentes Scraping abgeschlossen in {duration:.1f} Sekunden")
-            self.logger.info(f"📊 Einzigartige Listings: {unique_listings}")
-            self.logger.info(f"📈 Gesamte Preisänderungen: {len(self.price_history)}")
+            self.logger.info("✅ Intelligentes Scraping abgeschlossen in %.1f Sekunden", duration)
+            self.logger.info("📊 Einzigartige Listings: %d", unique_listings)
+            self.logger.info("📈 Gesamte Preisänderungen: %d", len(self.price_history))
             
             # Effizienz-Statistik
-            if duration > 0:
+            if duration > 0 and self.logger.isEnabledFor(logging.INFO):
                 listings_per_second = unique_listings / duration
-                self.logger.info(f"⚡ Effizienz: {listings_per_second:.2f} Listings/Sekunde")
+                self.logger.info("⚡ Effizienz: %.2f Listings/Sekunde", listings_per_second)
             
         except Exception as e:
-            self.logger.error(f"❌ Fehler beim intelligenten Scraping: {e}")
+            self.logger.error("❌ Fehler beim intelligenten Scraping: %s", e)
             raise
-        finally:
-            self.session.close()
 
     def get_price_summary(self) -> Dict:
         """Erstellt eine Zusammenfassung der Preisdaten"""
         if self.current_listings.empty:
             return {}
         
+        # Unveränderte Listings -> gespeichertes Ergebnis wiederverwenden
+        if self._price_summary_cache and self._price_summary_cache[0] is self.current_listings:
+            return dict(self._price_summary_cache[1])
+        
         # Konvertiere Preise zu numerisch
         prices = pd.to_numeric(self.current_listings['price'], errors='coerce').dropna()
         
         if prices.empty:
             return {}
         
+        # Alle Kennzahlen in einem Aggregationsaufruf
+        stats = prices.agg(['mean', 'median', 'min', 'max'])
+        
         summary = {
             'total_listings': len(self.current_listings),
-            'avg_price': float(prices.mean()),
-            'median_price': float(prices.median()),
-            'min_price': float(prices.min()),
-            'max_price': float(prices.max()),
-            'price_range': float(prices.max() - prices.min()),
+            'avg_price': float(stats['mean']),
+            'median_price': float(stats['median']),
+            'min_price': float(stats['min']),
+            'max_price': float(stats['max']),
+            'price_range': float(stats['max'] - stats['min']),
         }
         
-        return summary
+        self._price_summary_cache = (self.current_listings, summary)
+        
+        return dict(summary)
     
     def get_all_vehicle_models(self) -> List[tuple]:
         """Gibt alle verfügbaren Fahrzeugmodelle aus der Datenbank zurück"""
         if self.use_database and self.database:
-            return self.database.get_all_vehicle_models()
+            return self._cached_vehicle_models()
         else:
             self.logger.warning("Fahrzeugmodell-Liste nur im Datenbank-Modus verfügbar")
             return [(self.make, self.model)]
@@ -842,10 +977,16 @@ class AutoScout24LuxembourgScraper:
     def get_statistics(self, make: str = None, model: str = None) -> Dict:
         """Erstellt Statistiken für ein oder alle Fahrzeugmodelle"""
         if self.use_database and self.database:
-            return self.database.get_statistics(
-                make or self.make, 
-                model or self.model
-            )
+            key = (make or self.make, model or self.model)
+            stats = self._statistics_cache.get(key)
+            if stats is None:
+                stats = self.database.get_statistics(*key)
+                if not stats:
+                    return {}
+                self._statistics_cache[key] = stats
+            
+            # Kopie, damit Aufrufer den zwischengespeicherten Eintrag nicht verändern
+            return copy.deepcopy(stats)
         else:
             self.logger.warning("Statistiken nur im Datenbank-Modus verfügbar")
             return {}
@@ -886,24 +1027,27 @@ class AutoScout24LuxembourgScraper:
             
             deleted_count = 0
             
-            # Lösche nur Multi-Model-Summary aus data-Verzeichnis (falls noch welche da sind)
-            for summary_file in data_path.glob("multi_model_summary_*.txt"):
-                try:
-                    summary_file.unlink()
-                    deleted_count += 1
-                    print(f"   Gelöscht: {summary_file.name}")
-                except Exception as e:
-                    print(f"   Warnung: Fehler beim Löschen von {summary_file}: {e}")
-            
-            # Lösche nur Multi-Model-Summary aus logs/multi_model-Verzeichnis
-            if multi_model_dir.exists():
-                for summary_file in multi_model_dir.glob("multi_model_summary_*.txt"):
+            # Lösche nur Multi-Model-Summary aus data- und logs/multi_model-Verzeichnis
+            # (eine Verzeichnis-Enumeration pro Ordner via os.scandir)
+            for summary_dir, prefix in ((data_path, ""), (multi_model_dir, "logs/multi_model/")):
+                if not summary_dir.exists():
+                    continue
+                
+                with os.scandir(summary_dir) as entries:
+                    victims = [
+                        entry for entry in entries
+                        if entry.is_file()
+                        and entry.name.startswith("multi_model_summary_")
+                        and entry.name.endswith(".txt")
+                    ]
+                
+                for entry in victims:
                     try:
-                        summary_file.unlink()
+                        os.unlink(entry.path)
                         deleted_count += 1
-                        print(f"   Gelöscht: logs/multi_model/{summary_file.name}")
-                    except Exception as e:
-                        print(f"   Warnung: Fehler beim Löschen von {summary_file}: {e}")
+                        print(f"   Gelöscht: {prefix}{entry.name}")
+                    except OSError as e:
+                        print(f"   Warnung: Fehler beim Löschen von {entry.path}: {e}")
             
             if deleted_count > 0:
                 print(f"✅ {deleted_count} alte Multi-Model-Summary-Dateien gelöscht")
@@ -913,7 +1057,11 @@ class AutoScout24LuxembourgScraper:
         except Exception as e:
             print(f"⚠️  Fehler beim Aufräumen von Multi-Model-Summary-Dateien: {e}")
         
+        # Datenbank-Handle der ersten erfolgreichen Instanz für die Multi-Model-Zusammenfassung
+        summary_database = None
+        
         for make, model in vehicle_models:
+            scraper = None
             try:
                 print(f"\n{'='*60}")
                 print(f"🚗 Intelligentes Scraping: {make} {model}")
@@ -939,10 +1087,22 @@ class AutoScout24LuxembourgScraper:
                     'status': 'success'
                 }
                 
+                # Nur die Datenbank behalten, nicht den ganzen Scraper (DataFrames)
+                if summary_database is None and scraper.database:
+                    summary_database = scraper.database
+                    scraper.database = None
+                
                 # Intelligente Pause zwischen verschiedenen Modellen
-                # Längere Pause für bessere Server-Schonung
-                model_delay = max(5, delay * 2)
-                print(f"⏸️  Pause {model_delay}s vor nächstem Modell...")
+                last_rtt_ms = scraper._last_response_time_ms
+                if adaptive_delay and last_rtt_ms is not None:
+                    # Pause proportional zur gemessenen Serverantwortzeit (1-10s),
+                    # aber nie kürzer als die konfigurierte Verzögerung
+                    model_delay = max(1.0, delay, min(10.0, 3 * last_rtt_ms / 1000))
+                    print(f"⏸️  Pause {model_delay:.1f}s vor nächstem Modell (Antwortzeit: {last_rtt_ms:.0f}ms)...")
+                else:
+                    # Längere Pause für bessere Server-Schonung
+                    model_delay = max(5, delay * 2)
+                    print(f"⏸️  Pause {model_delay}s vor nächstem Modell...")
                 time.sleep(model_delay)
                 
             except Exception as e:
@@ -951,31 +1111,69 @@ class AutoScout24LuxembourgScraper:
                     'status': 'error',
                     'error': str(e)
                 }
+            finally:
+                # Scraper-Instanz sofort freigeben, damit die DataFrames nicht bis
+                # zum nächsten Modell im Speicher bleiben
+                if scraper is not None:
+                    scraper.close_database()
+                    del scraper
+                    gc.collect()
         
         # Erstelle zentrale Multi-Model-Zusammenfassung
         try:
-            # Verwende die erste erfolgreiche Scraper-Instanz für die Datenbank
-            successful_scraper = None
-            for make, model in vehicle_models:
-                try:
-                    test_scraper = cls(make=make, model=model, data_dir=data_dir)
-                    if test_scraper.database:
-                        successful_scraper = test_scraper
-                        break
-                except:
-                    continue
+            # Fallback: Datenbank über eine neue Instanz öffnen falls kein Modell erfolgreich war
+            if summary_database is None:
+                for make, model in vehicle_models:
+                    try:
+                        test_scraper = cls(make=make, model=model, data_dir=data_dir)
+                        if test_scraper.database:
+                            summary_database = test_scraper.database
+                            test_scraper.database = None
+                            break
+                    except:
+                        continue
             
-            if successful_scraper and successful_scraper.database:
-                summary_file = successful_scraper.database.create_multi_model_summary(data_dir)
+            if summary_database:
+                summary_file = summary_database.create_multi_model_summary(data_dir)
                 print(f"\n📋 Multi-Model-Zusammenfassung erstellt: {summary_file}")
             else:
                 print(f"\n⚠️  Keine Datenbankverbindung für Multi-Model-Zusammenfassung verfügbar")
                 
         except Exception as e:
             print(f"\n❌ Fehler beim Erstellen der Multi-Model-Zusammenfassung: {e}")
+        finally:
+            if summary_database:
+                summary_database.close()
+        
+        # Gemeinsame HTTP-Session erst nach dem letzten Modell schließen
+        cls.shutdown_session()
         
         return results
 
+    @staticmethod
+    def _truncate_titles(titles: pd.Series, max_length: int) -> pd.Series:
+        """Kürzt Titel vektorisiert auf max_length Zeichen (mit "..." bei Überlänge)"""
+        titles = titles.astype(str)
+        return titles.str.slice(0, max_length) + np.where(titles.str.len() > max_length, "...", "")
+
+    @classmethod
+    def _format_prices(cls, values: pd.Series) -> pd.Series:
+        """Formatiert eine Preisspalte in einem Durchgang ("N/A" für fehlende Werte)"""
+        return values.map(cls.PRICE_FORMAT.format, na_action='ignore').fillna("N/A")
+    
+    def _price_change_lines(self, changes: pd.DataFrame, sign: str):
+        """Liefert (Titel, "alt → neu (±diff)") Paare für eine Preisänderungs-Tabelle"""
+        if changes.empty:
+            return []
+        
+        titles = self._truncate_titles(changes['title'], 50)
+        price_strs = (
+            self._format_prices(changes['price_old']) + " → "
+            + self._format_prices(changes['price_new']) + f" ({sign}"
+            + self._format_prices(changes['price_difference'].abs()) + ")"
+        )
+        return zip(titles, price_strs)
+
     def _create_update_summary(self, new_listings_count: int = 0):
         """Erstellt eine Datei mit neuen Listings und Preisänderungen im logs Ordner"""
         try:
@@ -1005,32 +1203,32 @@ class AutoScout24LuxembourgScraper:
                     f.write(f"Gesamt gefundene Listings: {len(self.current_listings)}\n")
                     f.write(f"Neue Listings: {new_listings_count}\n\n")
                     
-                    # Preisstatistiken
-                    prices = pd.to_numeric(self.current_listings['price'], errors='coerce').dropna()
-                    if not prices.empty:
+                    # Preisstatistiken (eine Aggregation, zwischengespeichert in get_price_summary)
+                    price_summary = self.get_price_summary()
+                    if price_summary:
                         f.write(f"PREISSTATISTIKEN\n")
                         f.write(f"================\n")
-                        f.write(f"Durchschnittspreis: €{prices.mean():,.0f}\n")
-                        f.write(f"Median-Preis: €{prices.median():,.0f}\n")
-                        f.write(f"Günstigstes: €{prices.min():,.0f}\n")
-                        f.write(f"Teuerstes: €{prices.max():,.0f}\n")
-                        f.write(f"Preisspanne: €{prices.max() - prices.min():,.0f}\n\n")
+                        price_format = self.PRICE_FORMAT.format
+                        f.write(f"Durchschnittspreis: {price_format(price_summary['avg_price'])}\n")
+                        f.write(f"Median-Preis: {price_format(price_summary['median_price'])}\n")
+                        f.write(f"Günstigstes: {price_format(price_summary['min_price'])}\n")
+                        f.write(f"Teuerstes: {price_format(price_summary['max_price'])}\n")
+                        f.write(f"Preisspanne: {price_format(price_summary['price_range'])}\n\n")
                     
                     # Top 5 günstigste neue Listings
                     if new_listings_count > 0:
-                        # Konvertiere Preise zu numerisch für Sortierung
-                        listings_with_numeric_price = self.current_listings.copy()
-                        listings_with_numeric_price['price_numeric'] = pd.to_numeric(listings_with_numeric_price['price'], errors='coerce')
-                        
-                        # Entferne Listings ohne gültigen Preis und sortiere
-                        valid_price_listings = listings_with_numeric_price.dropna(subset=['price_numeric'])
-                        if not valid_price_listings.empty:
-                            cheapest = valid_price_listings.nsmallest(5, 'price_numeric')
+                        # Nur die Preisspalte umwandeln (keine Kopie des DataFrames);
+                        # nsmallest ignoriert Listings ohne gültigen Preis
+                        prices = pd.Series(pd.to_numeric(self.current_listings['price'], errors='coerce').to_numpy())
+                        cheapest_prices = prices.nsmallest(5)
+                        if not cheapest_prices.empty:
                             f.write(f"TOP 5 GÜNSTIGSTE LISTINGS\n")
                             f.write(f"=========================\n")
-                            for idx, row in cheapest.iterrows():
-                                price = f"€{row['price_numeric']:,.0f}" if pd.notna(row['price_numeric']) else "N/A"
-                                title = row['title'][:60] + "..." if len(str(row['title'])) > 60 else row['title']
+                            titles = self._truncate_titles(
+                                self.current_listings['title'].iloc[cheapest_prices.index], 60
+                            )
+                            price_strs = self._format_prices(cheapest_prices)
+                            for title, price in zip(titles, price_strs):
                                 f.write(f"• {price} - {title}\n")
                             f.write("\n")
                 else:
@@ -1055,23 +1253,15 @@ class AutoScout24LuxembourgScraper:
                         
                         f.write(f"📉 PREISSENKUNGEN ({len(price_drops)})\n")
                         f.write(f"{'='*30}\n")
-                        for idx, row in price_drops.iterrows():
-                            title = row['title'][:50] + "..." if len(str(row['title'])) > 50 else row['title']
-                            old_price = f"€{row['price_old']:,.0f}" if pd.notna(row['price_old']) else "N/A"
-                            new_price = f"€{row['price_new']:,.0f}" if pd.notna(row['price_new']) else "N/A"
-                            diff = f"€{abs(row['price_difference']):,.0f}" if pd.notna(row['price_difference']) else "N/A"
+                        for title, price_str in self._price_change_lines(price_drops, "-"):
                             f.write(f"• {title}\n")
-                            f.write(f"  {old_price} → {new_price} (-{diff})\n\n")
+                            f.write(f"  {price_str}\n\n")
                         
                         f.write(f"📈 PREISERHÖHUNGEN ({len(price_increases)})\n")
                         f.write(f"{'='*30}\n")
-                        for idx, row in price_increases.iterrows():
-                            title = row['title'][:50] + "..." if len(str(row['title'])) > 50 else row['title']
-                            old_price = f"€{row['price_old']:,.0f}" if pd.notna(row['price_old']) else "N/A"
-                            new_price = f"€{row['price_new']:,.0f}" if pd.notna(row['price_new']) else "N/A"
-                            diff = f"€{row['price_difference']:,.0f}" if pd.notna(row['price_difference']) else "N/A"
+                        for title, price_str in self._price_change_lines(price_increases, "+"):
                             f.write(f"• {title}\n")
-                            f.write(f"  {old_price} → {new_price} (+{diff})\n\n")
+                            f.write(f"  {price_str}\n\n")
                     else:
                         f.write("Keine Preisänderungen heute.\n\n")
                 else:
@@ -1118,9 +1308,11 @@ def main():
     parser.add_argument('--delay', type=int, default=2, help='Basis-Verzögerung zwischen Requests (Sekunden)')
     parser.add_argument('--data-dir', default='data', help='Datenverzeichnis')
     parser.add_argument('--csv-mode', action='store_true', help='Verwende CSV-Dateien statt Datenbank')
+    parser.add_argument('--csv-history', action='store_true', help='Preishistorie im CSV-Modus zusätzlich als CSV speichern')
     parser.add_argument('--multi-model', help='CSV-Datei mit make,model Paaren für Multi-Scraping')
     parser.add_argument('--list-models', action='store_true', help='Zeige alle Fahrzeugmodelle in der Datenbank')
     parser.add_argument('--stats', action='store_true', help='Zeige Datenbankstatistiken')
+    parser.add_argument('--export-all', action='store_true', help='Exportiere alle Fahrzeugmodelle der Datenbank als CSV')
     
     # Neue intelligente Scraping-Optionen
     parser.add_argument('--no-auto-stop', action='store_true', help='Deaktiviere automatisches Stoppen bei leeren Seiten')
@@ -1147,6 +1339,17 @@ def main():
         scraper.close_database()
         return
     
+    # Exportiere alle Fahrzeugmodelle als CSV
+    if args.export_all:
+        scraper = AutoScout24LuxembourgScraper(
+            make="dummy", model="dummy", data_dir=args.data_dir
+        )
+        exported = scraper.database.export_all_to_csv(args.data_dir)
+        print(f"\n📄 CSV-Export abgeschlossen: {exported} Fahrzeugmodelle")
+        
+        scraper.close_database()
+        return
+    
     # Zeige Statistiken
     if args.stats:
         scraper = AutoScout24LuxembourgScraper(
@@ -1194,12 +1397,14 @@ def main():
     if args.multi_model:
         try:
             import csv
-            vehicle_models = []
             
-            with open(args.multi_model, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    vehicle_models.append((row['make'], row['model']))
+            with open(args.multi_model, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader)
+                make_idx = header.index('make')
+                model_idx = header.index('model')
+                # Leere Zeilen überspringen (wie csv.DictReader)
+                vehicle_models = [(row[make_idx], row[model_idx]) for row in reader if row]
             
             print(f"\n🚗 Intelligentes Multi-Model Scraping für {len(vehicle_models)} Fahrzeugmodelle")
             
@@ -1245,7 +1450,8 @@ def main():
         make=args.make,
         model=args.model,
         data_dir=args.data_dir,
-        use_database=not args.csv_mode
+        use_database=not args.csv_mode,
+        export_csv_history=args.csv_history
     )
     
     print(f"\n🚗 Intelligentes Scraping: {args.make} {args.model}")
@@ -1264,12 +1470,15 @@ def main():
     print(f"⚙️  Stop-on-Empty: {stop_on_empty}, Adaptive-Delay: {adaptive_delay}")
     
     # Führe intelligentes Scraping durch
-    scraper.run_daily_scrape(
-        max_pages=max_pages, 
-        delay=args.delay,
-        stop_on_empty=stop_on_empty,
-        adaptive_delay=adaptive_delay
-    )
+    try:
+        scraper.run_daily_scrape(
+            max_pages=max_pages, 
+            delay=args.delay,
+            stop_on_empty=stop_on_empty,
+            adaptive_delay=adaptive_delay
+        )
+    finally:
+        AutoScout24LuxembourgScraper.shutdown_session()
     
     # Zeige Preiszusammenfassung
     summary = scraper.get_price_summary()
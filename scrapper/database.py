@@ -14,9 +14,118 @@ import sqlite3
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
 import logging
 import json
+import csv
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional: DuckDB für spaltenorientierte Auswertungen direkt auf der SQLite-Datei
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+
+# SQL-Vorlagen der Schreibpfade einmalig auf Modulebene (identischer Text
+# für jeden Aufruf, damit der Statement-Cache von sqlite3 zuverlässig trifft)
+_SQL_UPSERT_LISTING = """
+INSERT INTO listings (
+    listing_id, make, model, title, url, price, mileage, fuel_type,
+    first_registration, power, transmission, seller_type, location,
+    scraped_date, scraped_timestamp
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(listing_id, make, model) DO UPDATE SET
+    title = excluded.title, url = excluded.url, price = excluded.price,
+    mileage = excluded.mileage, fuel_type = excluded.fuel_type,
+    first_registration = excluded.first_registration, power = excluded.power,
+    transmission = excluded.transmission, seller_type = excluded.seller_type,
+    location = excluded.location, scraped_date = excluded.scraped_date,
+    scraped_timestamp = excluded.scraped_timestamp,
+    is_active = 1, updated_at = CURRENT_TIMESTAMP
+"""
+
+_SQL_INSERT_PRICE_CHANGE = """
+INSERT INTO price_history (
+    listing_id, make, model, title, price_old, price_new,
+    price_difference, price_change_percent, change_type,
+    change_date, change_timestamp, last_seen, change_day
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_UPSERT_METADATA = """
+INSERT INTO scraping_metadata (
+    make, model, last_scrape_date, last_scrape_timestamp,
+    total_listings, new_listings, price_changes,
+    scraper_version, status, error_message
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(make, model) DO UPDATE SET
+    last_scrape_date = excluded.last_scrape_date,
+    last_scrape_timestamp = excluded.last_scrape_timestamp,
+    total_listings = excluded.total_listings,
+    new_listings = excluded.new_listings,
+    price_changes = excluded.price_changes,
+    scraper_version = excluded.scraper_version,
+    status = excluded.status,
+    error_message = excluded.error_message
+"""
+
+_SQL_COUNT_LISTINGS = "SELECT COUNT(*) FROM listings WHERE make = ? AND model = ?"
+_SQL_COUNT_ACTIVE_LISTINGS = "SELECT COUNT(*) FROM listings WHERE make = ? AND model = ? AND is_active = 1"
+
+_SQL_CREATE_TMP_IDS = "CREATE TEMP TABLE IF NOT EXISTS tmp_ids (listing_id TEXT PRIMARY KEY)"
+_SQL_CLEAR_TMP_IDS = "DELETE FROM tmp_ids"
+_SQL_INSERT_TMP_ID = "INSERT OR IGNORE INTO tmp_ids VALUES (?)"
+_SQL_COUNT_TMP_IDS = "SELECT COUNT(*) FROM tmp_ids"
+
+# Nur IDs behalten, die für das Modell aktuell aktiv sind (bereits inaktive Listings
+# dürfen durch die Reaktivierung nicht wieder aktiv werden)
+_SQL_KEEP_ACTIVE_TMP_IDS = """
+DELETE FROM tmp_ids
+WHERE listing_id NOT IN (
+    SELECT listing_id FROM listings
+    WHERE make = ? AND model = ? AND is_active = 1
+)
+"""
+
+# Nur noch aktive Zeilen anfassen: bereits inaktive Listings werden nicht bei jedem
+# Lauf neu geschrieben, updated_at bleibt der Zeitpunkt der Deaktivierung
+_SQL_DEACTIVATE_ALL = """
+UPDATE listings
+SET is_active = 0, updated_at = CURRENT_TIMESTAMP
+WHERE make = ? AND model = ? AND is_active = 1
+"""
+
+_SQL_DEACTIVATE_MISSING = """
+UPDATE listings
+SET is_active = 0, updated_at = CURRENT_TIMESTAMP
+WHERE make = ? AND model = ? AND is_active = 1
+AND listing_id NOT IN (SELECT listing_id FROM tmp_ids)
+"""
+
+_SQL_REACTIVATE_CURRENT = """
+UPDATE listings
+SET is_active = 1, updated_at = CURRENT_TIMESTAMP
+WHERE make = ? AND model = ?
+AND listing_id IN (SELECT listing_id FROM tmp_ids)
+"""
+
+# Lesepfade pro Modell (fester SQL-Text, damit der Statement-Cache greift)
+_SQL_LISTING_PRICES = """
+SELECT listing_id, price FROM listings
+WHERE make = ? AND model = ? AND is_active = 1
+"""
+
+# LIMIT -1 = unbegrenzt
+_SQL_PRICE_HISTORY = """
+SELECT * FROM price_history
+WHERE make = ? AND model = ?
+ORDER BY change_timestamp DESC
+LIMIT ?
+"""
 
 
 class AutoScoutDatabase:
@@ -24,118 +133,366 @@ class AutoScoutDatabase:
     SQLite Datenbank-Manager für AutoScout24 Daten
     """
     
-    def __init__(self, db_path: str = "data/autoscout_data.db"):
+    # Explizite Spaltentypen für pandas (nur NOT NULL-Spalten mit garantiertem Typ,
+    # damit pandas keine Typinferenz pro Spalte durchführen muss)
+    LISTINGS_DTYPES = {
+        'id': 'int64',
+        'scraped_timestamp': 'int64',
+        'is_active': 'int8',
+    }
+    PRICE_HISTORY_DTYPES = {
+        'id': 'int64',
+        'price_old': 'float64',
+        'price_new': 'float64',
+        'price_difference': 'float64',
+        'price_change_percent': 'float64',
+        'change_timestamp': 'int64',
+    }
+    
+    # Exportierte Listing-Spalten (entspricht dem Format des CSV-Modus im Scraper)
+    LISTINGS_EXPORT_COLUMNS = (
+        'listing_id', 'make', 'model', 'title', 'url', 'price', 'mileage', 'fuel_type',
+        'first_registration', 'power', 'transmission', 'seller_type', 'location',
+        'scraped_date', 'scraped_timestamp'
+    )
+    
+    # Exportierte Preishistorie-Spalten (bisheriges CSV-Format, ohne interne Spalten wie change_day)
+    PRICE_HISTORY_EXPORT_COLUMNS = (
+        'id', 'listing_id', 'make', 'model', 'title', 'price_old', 'price_new',
+        'price_difference', 'price_change_percent', 'change_type', 'change_date',
+        'change_timestamp', 'last_seen', 'created_at'
+    )
+    
+    # Zeilen pro fetchmany()-Block beim CSV-Export
+    EXPORT_BATCH_SIZE = 10000
+    
+    # Verbindungs-PRAGMAs (journal_mode und synchronous sind über den Konstruktor wählbar)
+    CONNECTION_PRAGMAS = (
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA cache_size=-65536",
+        "PRAGMA busy_timeout=30000",
+    )
+    
+    # Ab dieser Batchgröße werden die Planer-Statistiken der Tabelle neu erhoben
+    ANALYZE_THRESHOLD = 1000
+    
+    def __init__(self, db_path: str = "data/autoscout_data.db",
+                 journal_mode: str = "WAL", synchronous: str = "NORMAL",
+                 use_duckdb: bool = False):
         """
         Initialisiert die Datenbankverbindung
         
         Args:
             db_path: Pfad zur SQLite-Datenbankdatei
+            journal_mode: SQLite-Journal-Modus (Standard: WAL)
+            synchronous: SQLite-Synchronisationsstufe (Standard: NORMAL, FULL für maximale Sicherheit)
+            use_duckdb: Auswertungen (get_statistics) über DuckDB ausführen, falls installiert
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
         
         # Logger
         self.logger = logging.getLogger(__name__)
         
-        # Datenbankverbindung
-        self.connection = None
+        self.use_duckdb = use_duckdb and DUCKDB_AVAILABLE
+        if use_duckdb and not self.use_duckdb:
+            self.logger.warning("DuckDB nicht verfügbar - Auswertungen laufen über SQLite")
+        self._duck = None
+        
+        # Datenbankverbindungen: eine pro Thread (siehe connection-Property)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._closed = False
         
         # Initialisiere Datenbank
         self._init_database()
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Datenbankverbindung des aktuellen Threads (wird bei Bedarf geöffnet)"""
+        if self._closed:
+            # Wie bei einer geschlossenen sqlite3-Verbindung, damit die
+            # sqlite3.Error-Behandlung der Methoden weiterhin greift
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Öffnet eine neue Verbindung mit den Performance-Einstellungen"""
+        # isolation_level=None: Transaktionen werden explizit über _transaction() gesteuert
+        connection = sqlite3.connect(
+            str(self.db_path), check_same_thread=False,
+            cached_statements=256, isolation_level=None
+        )
+        connection.row_factory = sqlite3.Row  # Ermöglicht Zugriff per Spaltenname
+        
+        # Performance-Einstellungen: WAL-Journal (Leser blockieren Schreiber nicht),
+        # weniger fsyncs, größerer Cache, Warten statt Fehler bei gesperrter Datenbank
+        pragmas = (
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+        ) + self.CONNECTION_PRAGMAS
+        for pragma in pragmas:
+            connection.execute(pragma)
+        
+        with self._connections_lock:
+            self._connections.append(connection)
         
+        return connection
+        
+    def _tuple_cursor(self) -> sqlite3.Cursor:
+        """Cursor mit einfachen Tupeln statt sqlite3.Row (für interne Abfragen ohne Spaltennamen)"""
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        return cursor
+    
     def _init_database(self):
         """Erstellt die Datenbank-Tabellen falls sie nicht existieren"""
         try:
-            self.connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row  # Ermöglicht Zugriff per Spaltenname
-            
+            # Schema einmalig über die Verbindung des erstellenden Threads anlegen
             cursor = self.connection.cursor()
             
-            # Tabelle für Fahrzeug-Listings
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS listings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    listing_id TEXT NOT NULL,
-                    make TEXT NOT NULL,
-                    model TEXT NOT NULL,
-                    title TEXT,
-                    url TEXT,
-                    price REAL,
-                    mileage INTEGER,
-                    fuel_type TEXT,
-                    first_registration TEXT,
-                    power TEXT,
-                    transmission TEXT,
-                    seller_type TEXT,
-                    location TEXT,
-                    scraped_date TEXT NOT NULL,
-                    scraped_timestamp INTEGER NOT NULL,
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(listing_id, make, model)
-                )
-            """)
-            
-            # Tabelle für Preishistorie
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS price_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    listing_id TEXT NOT NULL,
-                    make TEXT NOT NULL,
-                    model TEXT NOT NULL,
-                    title TEXT,
-                    price_old REAL NOT NULL,
-                    price_new REAL NOT NULL,
-                    price_difference REAL NOT NULL,
-                    price_change_percent REAL NOT NULL,
-                    change_type TEXT NOT NULL,
-                    change_date TEXT NOT NULL,
-                    change_timestamp INTEGER NOT NULL,
-                    last_seen TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabelle für Scraping-Metadaten
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS scraping_metadata (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    make TEXT NOT NULL,
-                    model TEXT NOT NULL,
-                    last_scrape_date TEXT NOT NULL,
-                    last_scrape_timestamp INTEGER NOT NULL,
-                    total_listings INTEGER DEFAULT 0,
-                    new_listings INTEGER DEFAULT 0,
-                    price_changes INTEGER DEFAULT 0,
-                    scraper_version TEXT,
-                    status TEXT DEFAULT 'success',
-                    error_message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(make, model)
-                )
-            """)
+            with self._transaction():
+                # Tabelle für Fahrzeug-Listings
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS listings (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        listing_id TEXT NOT NULL,
+                        make TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        title TEXT,
+                        url TEXT,
+                        price REAL,
+                        mileage INTEGER,
+                        fuel_type TEXT,
+                        first_registration TEXT,
+                        power TEXT,
+                        transmission TEXT,
+                        seller_type TEXT,
+                        location TEXT,
+                        scraped_date TEXT NOT NULL,
+                        scraped_timestamp INTEGER NOT NULL,
+                        is_active BOOLEAN DEFAULT 1,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE(listing_id, make, model)
+                    )
+                """)
             
-            # Indices für bessere Performance
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_make_model ON listings(make, model)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_listing_id ON listings(listing_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_price ON listings(price)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_scraped_date ON listings(scraped_date)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_listing_id ON price_history(listing_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_change_date ON price_history(change_date)")
+                # Tabelle für Preishistorie
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS price_history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        listing_id TEXT NOT NULL,
+                        make TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        title TEXT,
+                        price_old REAL NOT NULL,
+                        price_new REAL NOT NULL,
+                        price_difference REAL NOT NULL,
+                        price_change_percent REAL NOT NULL,
+                        change_type TEXT NOT NULL,
+                        change_date TEXT NOT NULL,
+                        change_timestamp INTEGER NOT NULL,
+                        last_seen TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        change_day INTEGER
+                    )
+                """)
+                self._migrate_price_history_day(cursor)
+            
+                # Tabelle für Scraping-Metadaten
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scraping_metadata (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        make TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        last_scrape_date TEXT NOT NULL,
+                        last_scrape_timestamp INTEGER NOT NULL,
+                        total_listings INTEGER DEFAULT 0,
+                        new_listings INTEGER DEFAULT 0,
+                        price_changes INTEGER DEFAULT 0,
+                        scraper_version TEXT,
+                        status TEXT DEFAULT 'success',
+                        error_message TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE(make, model)
+                    )
+                """)
+            
+                # Indices für bessere Performance
+                # (make, model) wird von idx_listings_lookup als Präfix abgedeckt
+                cursor.execute("DROP INDEX IF EXISTS idx_listings_make_model")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_listings_price ON listings(price)")
+                # Überflüssige Indices entfernen: listing_id deckt UNIQUE(listing_id, make, model) ab,
+                # scraped_date wird in keiner Abfrage gefiltert oder sortiert
+                cursor.execute("DROP INDEX IF EXISTS idx_listings_listing_id")
+                cursor.execute("DROP INDEX IF EXISTS idx_listings_scraped_date")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_listing_id ON price_history(listing_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_change_date ON price_history(change_date)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_history_day ON price_history(change_day, make, model)")
+            
+                # Zusammengesetzte Indices für Filter auf aktive Listings inkl. Sortierung
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_listings_active_sorted
+                    ON listings(make, model, is_active, scraped_timestamp DESC)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_listings_active_only
+                    ON listings(make, model, scraped_timestamp DESC) WHERE is_active = 1
+                """)
+                
+                # Abgleich aktueller IDs (Inaktiv-Markierung) und Preishistorie je Modell nach Zeit
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_listings_lookup
+                    ON listings(make, model, listing_id, is_active)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_price_history_order
+                    ON price_history(make, model, change_timestamp DESC)
+                """)
+            
+            # Planer-Statistiken erheben, wo sie fehlen oder veraltet sind
+            # (günstiger als ein vollständiges ANALYZE bei jedem Öffnen)
+            cursor.execute("PRAGMA optimize=0x10002")
             
-            self.connection.commit()
             self.logger.info(f"Datenbank initialisiert: {self.db_path}")
             
         except sqlite3.Error as e:
             self.logger.error(f"Fehler beim Initialisieren der Datenbank: {e}")
             raise
     
+    def _migrate_price_history_day(self, cursor: sqlite3.Cursor):
+        """Ergänzt die Spalte change_day (YYYYMMDD) in bestehenden Datenbanken"""
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(price_history)")}
+        if 'change_day' in columns:
+            return
+        
+        cursor.execute("ALTER TABLE price_history ADD COLUMN change_day INTEGER")
+        cursor.execute("""
+            UPDATE price_history
+            SET change_day = CAST(REPLACE(SUBSTR(change_date, 1, 10), '-', '') AS INTEGER)
+        """)
+        self.logger.info("Spalte change_day in price_history ergänzt")
+    
+    @staticmethod
+    def _day_key(change_date: str) -> int:
+        """Wandelt ein ISO-Datum in einen ganzzahligen Tagesschlüssel (YYYYMMDD) um"""
+        return int(change_date[:10].replace('-', ''))
+    
+    def _duckdb_connection(self):
+        """Öffnet bei Bedarf eine DuckDB-Verbindung mit der SQLite-Datei (nur lesend)"""
+        if self._duck is None:
+            # Kein automatischer Download: die sqlite-Extension muss vorab installiert sein
+            # (python -c "import duckdb; duckdb.execute('INSTALL sqlite')")
+            duck = duckdb.connect(config={'autoinstall_known_extensions': False})
+            try:
+                duck.execute("LOAD sqlite")
+                db_path = str(self.db_path).replace("'", "''")
+                duck.execute(f"ATTACH '{db_path}' AS autoscout (TYPE SQLITE, READ_ONLY)")
+                duck.execute("USE autoscout")
+            except duckdb.Error:
+                duck.close()
+                raise
+            self._duck = duck
+        return self._duck
+    
+    def _analytics_rows(self, query: str, params: tuple) -> List[Dict[str, Any]]:
+        """
+        Führt eine Auswertungsabfrage aus - über DuckDB falls aktiviert, sonst über SQLite
+        
+        Args:
+            query: SQL-Abfrage (von SQLite und DuckDB gleichermaßen ausführbar)
+            params: Abfrageparameter
+            
+        Returns:
+            Liste der Ergebniszeilen als Dictionaries
+        """
+        if self.use_duckdb:
+            try:
+                result = self._duckdb_connection().execute(query, params)
+                columns = [column[0] for column in result.description]
+                return [dict(zip(columns, row)) for row in result.fetchall()]
+            except duckdb.Error as e:
+                # Z.B. sqlite-Extension nicht installiert: dauerhaft auf SQLite zurückfallen
+                self.logger.warning(f"DuckDB-Abfrage fehlgeschlagen, verwende SQLite: {e}")
+                self.use_duckdb = False
+        
+        cursor = self.connection.cursor()
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def transaction(self):
+        """
+        Fasst mehrere Schreibmethoden zu einer Transaktion zusammen (ein COMMIT statt vieler)
+        
+        Returns:
+            Context-Manager; innere Schreibmethoden laufen in dieser Transaktion mit
+        """
+        return self._transaction()
+    
+    @contextmanager
+    def _transaction(self):
+        """Führt den Block in einer expliziten Transaktion aus (COMMIT bzw. ROLLBACK bei Fehlern)"""
+        if self.connection.in_transaction:
+            # Bereits in einer äußeren Transaktion: diese entscheidet über COMMIT/ROLLBACK
+            yield self.connection
+            return
+        
+        # IMMEDIATE: Schreibsperre sofort holen (mit busy_timeout warten), statt eine
+        # Lesetransaktion später hochzustufen und dabei SQLITE_BUSY zu riskieren
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        else:
+            self.connection.execute("COMMIT")
+    
     def close(self):
-        """Schließt die Datenbankverbindung"""
-        if self.connection:
-            self.connection.close()
-            self.logger.info("Datenbankverbindung geschlossen")
+        """Schließt alle Datenbankverbindungen (aller Threads)"""
+        if self._closed:
+            return
+        
+        self._closed = True
+        if self._duck is not None:
+            self._duck.close()
+            self._duck = None
+        
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        
+        if not connections:
+            return
+        
+        # Zuerst alle übrigen Verbindungen schließen, dann die letzte zurückschalten
+        for connection in connections[:-1]:
+            connection.close()
+        
+        last_connection = connections[-1]
+        try:
+            # Planer-Statistiken für Tabellen mit geänderter Nutzung aktualisieren
+            last_connection.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            self.logger.debug(f"PRAGMA optimize fehlgeschlagen: {e}")
+        try:
+            # Zurück zum Rollback-Journal, damit die Datei ohne -wal/-shm
+            # weitergegeben werden kann (z.B. an das sql.js-Frontend)
+            last_connection.execute("PRAGMA journal_mode=DELETE")
+        except sqlite3.Error as e:
+            # Andere Datenbank-Instanzen sind noch offen - die letzte schaltet zurück
+            self.logger.debug(f"Journal-Modus nicht zurückgesetzt: {e}")
+        last_connection.close()
+        self.logger.info("Datenbankverbindung geschlossen")
     
     def insert_listings(self, listings_data: List[Dict[str, Any]], make: str, model: str) -> int:
         """
@@ -151,76 +508,89 @@ class AutoScoutDatabase:
         """
         if not listings_data:
             return 0
+        
+        # Generator: executemany liest die Zeilen direkt, ohne Zwischenliste
+        rows = (
+            (
+                listing['listing_id'],
+                make,
+                model,
+                listing.get('title'),
+                listing.get('url'),
+                listing.get('price'),
+                listing.get('mileage'),
+                listing.get('fuel_type'),
+                listing.get('first_registration'),
+                listing.get('power'),
+                listing.get('transmission'),
+                listing.get('seller_type'),
+                listing.get('location'),
+                listing.get('scraped_date'),
+                listing.get('scraped_timestamp')
+            )
+            for listing in listings_data
+        )
+        
+        return self._upsert_listing_rows(rows, len(listings_data), make, model)
+    
+    def insert_listings_df(self, listings_df: pd.DataFrame, make: str, model: str) -> int:
+        """
+        Wie insert_listings, aber direkt aus einem DataFrame (ohne Umweg über Dictionaries)
+        
+        Args:
+            listings_df: DataFrame mit den Listing-Spalten
+            make: Fahrzeugmarke
+            model: Fahrzeugmodell
             
-        cursor = self.connection.cursor()
-        inserted_count = 0
-        updated_count = 0
+        Returns:
+            Anzahl der eingefügten Datensätze
+        """
+        if listings_df.empty:
+            return 0
+        
+        # Spalten in UPSERT-Reihenfolge; fehlende Spalten und Werte (NaN, pd.NA, NaT)
+        # werden zu None, da sqlite3 z.B. pd.NA nicht binden kann
+        fields = [column for column in self.LISTINGS_EXPORT_COLUMNS if column not in ('make', 'model')]
+        listings_df = listings_df.reindex(columns=fields)
+        listings_df = listings_df.astype(object).where(listings_df.notna(), None)
+        rows = (
+            (row[0], make, model, *row[1:])
+            for row in listings_df.itertuples(index=False, name=None)
+        )
+        
+        return self._upsert_listing_rows(rows, len(listings_df), make, model)
+    
+    def _upsert_listing_rows(self, rows: Iterable[tuple], row_count: int, make: str, model: str) -> int:
+        """
+        Schreibt Listing-Zeilen per UPSERT und zählt neue gegenüber aktualisierten
+        
+        Args:
+            rows: Zeilen in der Spaltenreihenfolge von _SQL_UPSERT_LISTING
+            row_count: Anzahl der Zeilen
+            make: Fahrzeugmarke
+            model: Fahrzeugmodell
+            
+        Returns:
+            Anzahl der eingefügten Datensätze
+        """
+        cursor = self._tuple_cursor()
         
         try:
-            for listing in listings_data:
-                # Prüfe ob Listing bereits existiert
-                cursor.execute("""
-                    SELECT id, price, updated_at FROM listings 
-                    WHERE listing_id = ? AND make = ? AND model = ?
-                """, (listing['listing_id'], make, model))
+            with self._transaction():
+                # Neue Listings über die Zeilenzahl vor/nach dem UPSERT bestimmen
+                # (statt alle bestehenden IDs nach Python zu laden)
+                cursor.execute(_SQL_COUNT_LISTINGS, (make, model))
+                count_before = cursor.fetchone()[0]
                 
-                existing = cursor.fetchone()
+                # Ein UPSERT für alle Listings (nutzt UNIQUE(listing_id, make, model))
+                cursor.executemany(_SQL_UPSERT_LISTING, rows)
                 
-                if existing:
-                    # Update bestehender Eintrag
-                    cursor.execute("""
-                        UPDATE listings SET
-                            title = ?, url = ?, price = ?, mileage = ?, fuel_type = ?,
-                            first_registration = ?, power = ?, transmission = ?, seller_type = ?,
-                            location = ?, scraped_date = ?, scraped_timestamp = ?,
-                            is_active = 1, updated_at = CURRENT_TIMESTAMP
-                        WHERE listing_id = ? AND make = ? AND model = ?
-                    """, (
-                        listing.get('title'),
-                        listing.get('url'),
-                        listing.get('price'),
-                        listing.get('mileage'),
-                        listing.get('fuel_type'),
-                        listing.get('first_registration'),
-                        listing.get('power'),
-                        listing.get('transmission'),
-                        listing.get('seller_type'),
-                        listing.get('location'),
-                        listing.get('scraped_date'),
-                        listing.get('scraped_timestamp'),
-                        listing['listing_id'],
-                        make,
-                        model
-                    ))
-                    updated_count += 1
-                else:
-                    # Neuer Eintrag
-                    cursor.execute("""
-                        INSERT INTO listings (
-                            listing_id, make, model, title, url, price, mileage, fuel_type,
-                            first_registration, power, transmission, seller_type, location,
-                            scraped_date, scraped_timestamp
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        listing['listing_id'],
-                        make,
-                        model,
-                        listing.get('title'),
-                        listing.get('url'),
-                        listing.get('price'),
-                        listing.get('mileage'),
-                        listing.get('fuel_type'),
-                        listing.get('first_registration'),
-                        listing.get('power'),
-                        listing.get('transmission'),
-                        listing.get('seller_type'),
-                        listing.get('location'),
-                        listing.get('scraped_date'),
-                        listing.get('scraped_timestamp')
-                    ))
-                    inserted_count += 1
-            
-            self.connection.commit()
+                cursor.execute(_SQL_COUNT_LISTINGS, (make, model))
+                inserted_count = cursor.fetchone()[0] - count_before
+                updated_count = row_count - inserted_count
+            
+            if row_count > self.ANALYZE_THRESHOLD:
+                cursor.execute("ANALYZE listings")
             
             self.logger.info(
                 f"Listings gespeichert: {inserted_count} neu, {updated_count} aktualisiert "
@@ -230,29 +600,57 @@ class AutoScoutDatabase:
             return inserted_count  # Nur neue Listings zurückgeben
             
         except sqlite3.Error as e:
-            self.connection.rollback()
             self.logger.error(f"Fehler beim Speichern der Listings: {e}")
             raise
     
-    def get_existing_listings(self, make: str, model: str) -> pd.DataFrame:
+    def _read_dataframe(self, query: str, params: tuple, dtype: Dict[str, str] = None,
+                        chunksize: int = None) -> pd.DataFrame:
+        """
+        Führt eine Abfrage aus und gibt das Ergebnis als DataFrame zurück
+        
+        Args:
+            query: SQL-Abfrage
+            params: Abfrageparameter
+            dtype: Explizite Spaltentypen
+            chunksize: Zeilen pro Block (None = alles auf einmal)
+            
+        Returns:
+            DataFrame mit dem Abfrageergebnis
+        """
+        if not chunksize:
+            return pd.read_sql_query(query, self.connection, params=params, dtype=dtype)
+        
+        chunks = list(pd.read_sql_query(
+            query, self.connection, params=params, dtype=dtype, chunksize=chunksize
+        ))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    
+    def get_existing_listings(self, make: str, model: str, chunksize: int = None,
+                              columns: Sequence[str] = None) -> pd.DataFrame:
         """
         Lädt bestehende Listings für ein Fahrzeugmodell
         
         Args:
             make: Fahrzeugmarke
             model: Fahrzeugmodell
+            chunksize: Zeilen pro Block beim Laden (optional)
+            columns: Nur diese Spalten laden (optional, Standard: alle)
             
         Returns:
             DataFrame mit bestehenden Listings
         """
         try:
-            query = """
-                SELECT * FROM listings 
+            query = f"""
+                SELECT {', '.join(columns) if columns else '*'} FROM listings 
                 WHERE make = ? AND model = ? AND is_active = 1
                 ORDER BY scraped_timestamp DESC
             """
+            dtype = {
+                column: column_type for column, column_type in self.LISTINGS_DTYPES.items()
+                if not columns or column in columns
+            }
             
-            df = pd.read_sql_query(query, self.connection, params=(make, model))
+            df = self._read_dataframe(query, (make, model), dtype, chunksize)
             self.logger.info(f"Bestehende Listings geladen: {len(df)} für {make} {model}")
             
             return df
@@ -261,6 +659,26 @@ class AutoScoutDatabase:
             self.logger.error(f"Fehler beim Laden bestehender Listings: {e}")
             return pd.DataFrame()
     
+    def get_listing_price_map(self, make: str, model: str) -> Dict[str, Optional[float]]:
+        """
+        Lädt die aktuellen Preise aktiver Listings ohne Umweg über pandas
+        
+        Args:
+            make: Fahrzeugmarke
+            model: Fahrzeugmodell
+            
+        Returns:
+            Dictionary listing_id -> Preis
+        """
+        try:
+            cursor = self._tuple_cursor()
+            cursor.execute(_SQL_LISTING_PRICES, (make, model))
+            return dict(cursor.fetchall())
+            
+        except sqlite3.Error as e:
+            self.logger.error(f"Fehler beim Laden der Listing-Preise: {e}")
+            return {}
+    
     def insert_price_changes(self, price_changes: List[Dict[str, Any]], make: str, model: str) -> int:
         """
         Fügt Preisänderungen in die Datenbank ein
@@ -275,18 +693,11 @@ class AutoScoutDatabase:
         """
         if not price_changes:
             return 0
-            
-        cursor = self.connection.cursor()
         
         try:
-            for change in price_changes:
-                cursor.execute("""
-                    INSERT INTO price_history (
-                        listing_id, make, model, title, price_old, price_new, 
-                        price_difference, price_change_percent, change_type,
-                        change_date, change_timestamp, last_seen
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+            # Generator: executemany liest die Zeilen direkt, ohne Zwischenliste
+            rows = (
+                (
                     change['listing_id'],
                     make,
                     model,
@@ -298,20 +709,28 @@ class AutoScoutDatabase:
                     change['change_type'],
                     change['change_date'],
                     change['change_timestamp'],
-                    change.get('last_seen')
-                ))
+                    change.get('last_seen'),
+                    self._day_key(change['change_date'])
+                )
+                for change in price_changes
+            )
+            
+            with self._transaction() as connection:
+                connection.executemany(_SQL_INSERT_PRICE_CHANGE, rows)
+            
+            if len(price_changes) > self.ANALYZE_THRESHOLD:
+                self.connection.execute("ANALYZE price_history")
             
-            self.connection.commit()
             self.logger.info(f"Preisänderungen gespeichert: {len(price_changes)} für {make} {model}")
             
             return len(price_changes)
             
         except sqlite3.Error as e:
-            self.connection.rollback()
             self.logger.error(f"Fehler beim Speichern der Preisänderungen: {e}")
             raise
     
-    def get_price_history(self, make: str, model: str, limit: int = None) -> pd.DataFrame:
+    def get_price_history(self, make: str, model: str, limit: int = None,
+                          chunksize: int = None) -> pd.DataFrame:
         """
         Lädt Preishistorie für ein Fahrzeugmodell
         
@@ -319,21 +738,15 @@ class AutoScoutDatabase:
             make: Fahrzeugmarke
             model: Fahrzeugmodell
             limit: Maximale Anzahl Datensätze (optional)
+            chunksize: Zeilen pro Block beim Laden (optional)
             
         Returns:
             DataFrame mit Preishistorie
         """
         try:
-            query = """
-                SELECT * FROM price_history 
-                WHERE make = ? AND model = ?
-                ORDER BY change_timestamp DESC
-            """
-            
-            if limit:
-                query += f" LIMIT {limit}"
+            params = (make, model, limit if limit else -1)
             
-            df = pd.read_sql_query(query, self.connection, params=(make, model))
+            df = self._read_dataframe(_SQL_PRICE_HISTORY, params, self.PRICE_HISTORY_DTYPES, chunksize)
             self.logger.info(f"Preishistorie geladen: {len(df)} Einträge für {make} {model}")
             
             return df
@@ -358,22 +771,19 @@ class AutoScoutDatabase:
             error_message: Fehlermeldung (optional)
             scraper_version: Version des Scrapers
         """
-        cursor = self.connection.cursor()
+        # Zeitstempel einmalig bestimmen
+        now = datetime.now()
+        now_iso = now.isoformat()
+        now_ts = int(now.timestamp())
         
         try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO scraping_metadata (
-                    make, model, last_scrape_date, last_scrape_timestamp,
+            with self._transaction() as connection:
+                connection.execute(_SQL_UPSERT_METADATA, (
+                    make, model, now_iso, now_ts,
                     total_listings, new_listings, price_changes,
                     scraper_version, status, error_message
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                make, model, datetime.now().isoformat(), int(datetime.now().timestamp()),
-                total_listings, new_listings, price_changes,
-                scraper_version, status, error_message
-            ))
-            
-            self.connection.commit()
+                ))
+            
             self.logger.info(f"Metadaten aktualisiert für {make} {model}")
             
         except sqlite3.Error as e:
@@ -388,10 +798,18 @@ class AutoScoutDatabase:
             Liste von (make, model) Tupeln
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT DISTINCT make, model FROM listings ORDER BY make, model")
+            cursor = self._tuple_cursor()
             
+            # scraping_metadata hat genau eine Zeile pro Modell (UNIQUE(make, model))
+            # und ist damit viel kleiner als listings
+            cursor.execute("SELECT make, model FROM scraping_metadata ORDER BY make, model")
             models = cursor.fetchall()
+            
+            if not models:
+                # Fallback, falls noch keine Metadaten geschrieben wurden
+                cursor.execute("SELECT DISTINCT make, model FROM listings ORDER BY make, model")
+                models = cursor.fetchall()
+            
             return [(row[0], row[1]) for row in models]
             
         except sqlite3.Error as e:
@@ -410,68 +828,64 @@ class AutoScoutDatabase:
             Dictionary mit Statistiken
         """
         try:
-            cursor = self.connection.cursor()
-            
-            # Base WHERE Klausel
-            where_clause = "WHERE is_active = 1"
-            params = []
-            
-            if make and model:
-                where_clause += " AND make = ? AND model = ?"
-                params.extend([make, model])
-            elif make:
-                where_clause += " AND make = ?"
-                params.append(make)
-            
-            # Grundstatistiken
-            cursor.execute(f"""
-                SELECT 
-                    COUNT(*) as total_listings,
-                    AVG(price) as avg_price,
-                    MIN(price) as min_price,
-                    MAX(price) as max_price,
-                    AVG(mileage) as avg_mileage
-                FROM listings {where_clause} AND price IS NOT NULL
-            """, params)
-            
-            stats = dict(cursor.fetchone())
-            
-            # Kraftstoffarten
-            cursor.execute(f"""
-                SELECT fuel_type, COUNT(*) as count
-                FROM listings {where_clause} AND fuel_type IS NOT NULL
-                GROUP BY fuel_type
-                ORDER BY count DESC
-            """, params)
+            # Feste SQL-Texte mit optionalen Parametern (NULL = kein Filter),
+            # damit der Statement-Cache greift; Modell filtert nur zusammen mit Marke
+            make_param = make or None
+            model_param = model if make and model else None
+            params = (make_param, make_param, model_param, model_param)
             
-            fuel_types = {row[0]: row[1] for row in cursor.fetchall()}
+            # Grundstatistiken und Preisänderungen in einer Abfrage (je ein Aggregat pro Tabelle)
+            row = self._analytics_rows("""
+                SELECT l.*, p.* FROM (
+                    SELECT 
+                        COUNT(*) as total_listings,
+                        AVG(price) as avg_price,
+                        MIN(price) as min_price,
+                        MAX(price) as max_price,
+                        AVG(mileage) as avg_mileage
+                    FROM listings
+                    WHERE is_active = 1 AND price IS NOT NULL
+                    AND (? IS NULL OR make = ?) AND (? IS NULL OR model = ?)
+                ) l, (
+                    SELECT 
+                        COUNT(*) as total_changes,
+                        SUM(CASE WHEN price_difference < 0 THEN 1 ELSE 0 END) as price_drops,
+                        SUM(CASE WHEN price_difference > 0 THEN 1 ELSE 0 END) as price_increases,
+                        AVG(price_difference) as avg_change
+                    FROM price_history
+                    WHERE (? IS NULL OR make = ?) AND (? IS NULL OR model = ?)
+                ) p
+            """, params + params)[0]
+            stats = {key: row[key] for key in (
+                'total_listings', 'avg_price', 'min_price', 'max_price', 'avg_mileage'
+            )}
+            price_stats = {key: row[key] for key in (
+                'total_changes', 'price_drops', 'price_increases', 'avg_change'
+            )}
             
-            # Verkäufertypen
-            cursor.execute(f"""
-                SELECT seller_type, COUNT(*) as count
-                FROM listings {where_clause} AND seller_type IS NOT NULL
+            # Kraftstoff- und Verkäufertypen in einer Abfrage
+            type_rows = self._analytics_rows("""
+                SELECT 'fuel' as kind, fuel_type as key, COUNT(*) as count
+                FROM listings
+                WHERE is_active = 1 AND fuel_type IS NOT NULL
+                AND (? IS NULL OR make = ?) AND (? IS NULL OR model = ?)
+                GROUP BY fuel_type
+                UNION ALL
+                SELECT 'seller', seller_type, COUNT(*)
+                FROM listings
+                WHERE is_active = 1 AND seller_type IS NOT NULL
+                AND (? IS NULL OR make = ?) AND (? IS NULL OR model = ?)
                 GROUP BY seller_type
-            """, params)
-            
-            seller_types = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            # Preisänderungen
-            price_history_where = "WHERE 1=1"
-            if make and model:
-                price_history_where += " AND make = ? AND model = ?"
-            elif make:
-                price_history_where += " AND make = ?"
-            
-            cursor.execute(f"""
-                SELECT 
-                    COUNT(*) as total_changes,
-                    SUM(CASE WHEN price_difference < 0 THEN 1 ELSE 0 END) as price_drops,
-                    SUM(CASE WHEN price_difference > 0 THEN 1 ELSE 0 END) as price_increases,
-                    AVG(price_difference) as avg_change
-                FROM price_history {price_history_where}
-            """, params)
+                ORDER BY count DESC
+            """, params + params)
             
-            price_stats = dict(cursor.fetchone())
+            fuel_types = {}
+            seller_types = {}
+            for type_row in type_rows:
+                if type_row['kind'] == 'fuel':
+                    fuel_types[type_row['key']] = type_row['count']
+                else:
+                    seller_types[type_row['key']] = type_row['count']
             
             return {
                 'listings': stats,
@@ -495,25 +909,41 @@ class AutoScoutDatabase:
             current_listing_ids: Liste der aktuell gefundenen Listing-IDs
         """
         try:
-            cursor = self.connection.cursor()
+            cursor = self._tuple_cursor()
             
-            if current_listing_ids:
-                placeholders = ','.join(['?' for _ in current_listing_ids])
-                cursor.execute(f"""
-                    UPDATE listings 
-                    SET is_active = 0, updated_at = CURRENT_TIMESTAMP
-                    WHERE make = ? AND model = ? AND listing_id NOT IN ({placeholders})
-                """, [make, model] + current_listing_ids)
-            else:
-                # Alle als inaktiv markieren falls keine aktuellen Listings gefunden
-                cursor.execute("""
-                    UPDATE listings 
-                    SET is_active = 0, updated_at = CURRENT_TIMESTAMP
-                    WHERE make = ? AND model = ?
-                """, (make, model))
-            
-            affected_rows = cursor.rowcount
-            self.connection.commit()
+            with self._transaction():
+                if current_listing_ids:
+                    # Aktuelle IDs in temporäre Tabelle laden statt riesiger IN-Liste
+                    # (umgeht SQLITE_MAX_VARIABLE_NUMBER und das Parsen von N Platzhaltern)
+                    cursor.execute(_SQL_CREATE_TMP_IDS)
+                    cursor.execute(_SQL_CLEAR_TMP_IDS)
+                    cursor.executemany(
+                        _SQL_INSERT_TMP_ID,
+                        [(listing_id,) for listing_id in current_listing_ids]
+                    )
+                    cursor.execute(_SQL_KEEP_ACTIVE_TMP_IDS, (make, model))
+                    cursor.execute(_SQL_COUNT_ACTIVE_LISTINGS, (make, model))
+                    active_rows = cursor.fetchone()[0]
+                    cursor.execute(_SQL_COUNT_TMP_IDS)
+                    still_active = cursor.fetchone()[0]
+                    
+                    if active_rows - still_active > active_rows // 2:
+                        # Mehr als die Hälfte der aktiven wird inaktiv: alle deaktivieren und die
+                        # zuvor aktiven aktuellen reaktivieren (zwei indexgestützte Updates statt
+                        # großem NOT IN; tmp_ids enthält nur noch vorher aktive IDs)
+                        cursor.execute(_SQL_DEACTIVATE_ALL, (make, model))
+                        cursor.execute(_SQL_REACTIVATE_CURRENT, (make, model))
+                        affected_rows = active_rows - still_active
+                    else:
+                        cursor.execute(_SQL_DEACTIVATE_MISSING, (make, model))
+                        affected_rows = cursor.rowcount
+                    
+                    # IDs nicht bis zum nächsten Aufruf im Speicher halten
+                    cursor.execute(_SQL_CLEAR_TMP_IDS)
+                else:
+                    # Alle als inaktiv markieren falls keine aktuellen Listings gefunden
+                    cursor.execute(_SQL_DEACTIVATE_ALL, (make, model))
+                    affected_rows = cursor.rowcount
             
             if affected_rows > 0:
                 self.logger.info(f"{affected_rows} Listings als inaktiv markiert für {make} {model}")
@@ -522,6 +952,36 @@ class AutoScoutDatabase:
             self.logger.error(f"Fehler beim Markieren inaktiver Listings: {e}")
             raise
     
+    def _export_query_to_csv(self, query: str, params: tuple, csv_filename: Path) -> int:
+        """
+        Schreibt ein Abfrageergebnis blockweise per Cursor in eine CSV-Datei (ohne pandas)
+        
+        Args:
+            query: SQL-Abfrage
+            params: Abfrageparameter
+            csv_filename: Zieldatei
+            
+        Returns:
+            Anzahl exportierter Zeilen (0 = keine Datei geschrieben)
+        """
+        cursor = self._tuple_cursor()
+        cursor.execute(query, params)
+        
+        rows = cursor.fetchmany(self.EXPORT_BATCH_SIZE)
+        if not rows:
+            return 0
+        
+        exported = 0
+        with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')  # wie DataFrame.to_csv
+            writer.writerow([column[0] for column in cursor.description])
+            while rows:
+                writer.writerows(rows)
+                exported += len(rows)
+                rows = cursor.fetchmany(self.EXPORT_BATCH_SIZE)
+        
+        return exported
+    
     def export_to_csv(self, make: str, model: str, output_dir: str = "data"):
         """
         Exportiert Daten zu CSV-Dateien (für Kompatibilität mit Frontend)
@@ -536,23 +996,58 @@ class AutoScoutDatabase:
             output_path.mkdir(exist_ok=True)
             
             # Listings exportieren
-            listings_df = self.get_existing_listings(make, model)
-            if not listings_df.empty:
-                csv_filename = output_path / f"{make}_{model}_listings.csv"
-                listings_df.to_csv(csv_filename, index=False)
+            csv_filename = output_path / f"{make}_{model}_listings.csv"
+            if self._export_query_to_csv(f"""
+                SELECT {', '.join(self.LISTINGS_EXPORT_COLUMNS)} FROM listings 
+                WHERE make = ? AND model = ? AND is_active = 1
+                ORDER BY scraped_timestamp DESC
+            """, (make, model), csv_filename):
                 self.logger.info(f"Listings exportiert: {csv_filename}")
             
             # Preishistorie exportieren
-            price_history_df = self.get_price_history(make, model)
-            if not price_history_df.empty:
-                price_history_filename = output_path / f"{make}_{model}_price_history.csv"
-                price_history_df.to_csv(price_history_filename, index=False)
+            price_history_filename = output_path / f"{make}_{model}_price_history.csv"
+            if self._export_query_to_csv(f"""
+                SELECT {', '.join(self.PRICE_HISTORY_EXPORT_COLUMNS)} FROM price_history 
+                WHERE make = ? AND model = ?
+                ORDER BY change_timestamp DESC
+            """, (make, model), price_history_filename):
                 self.logger.info(f"Preishistorie exportiert: {price_history_filename}")
             
         except Exception as e:
             self.logger.error(f"Fehler beim CSV-Export: {e}")
             raise
     
+    def export_all_to_csv(self, output_dir: str = "data", max_workers: int = 4) -> int:
+        """
+        Exportiert alle Fahrzeugmodelle parallel zu CSV-Dateien
+        
+        Jeder Worker-Thread liest über seine eigene Verbindung (WAL erlaubt parallele Leser).
+        
+        Args:
+            output_dir: Ausgabeverzeichnis
+            max_workers: Maximale Anzahl paralleler Exporte
+            
+        Returns:
+            Anzahl exportierter Fahrzeugmodelle
+        """
+        vehicle_models = self.get_all_vehicle_models()
+        if not vehicle_models:
+            return 0
+        
+        Path(output_dir).mkdir(exist_ok=True)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.export_to_csv, make, model, output_dir)
+                for make, model in vehicle_models
+            ]
+            # Fehler einzelner Exporte weiterreichen
+            for future in futures:
+                future.result()
+        
+        self.logger.info(f"CSV-Export abgeschlossen: {len(vehicle_models)} Fahrzeugmodelle")
+        return len(vehicle_models)
+    
     def create_multi_model_summary(self, output_dir: str = "data") -> str:
         """
         Erstellt eine zentrale Zusammenfassung aller Fahrzeugmodelle mit neuesten Updates im logs Ordner
@@ -581,7 +1076,7 @@ class AutoScoutDatabase:
             # Summary-Datei jetzt im logs/multi_model Ordner
             summary_filename = multi_model_dir / f"multi_model_summary_{date_str}_{time_str}.txt"
             
-            cursor = self.connection.cursor()
+            cursor = self._tuple_cursor()
             
             with open(summary_filename, 'w', encoding='utf-8') as f:
                 f.write("AutoScout24 Multi-Model Update Summary\n")
@@ -603,6 +1098,31 @@ class AutoScoutDatabase:
                     f.write("Keine Scraping-Daten verfügbar.\n")
                     return str(summary_filename)
                 
+                # Preisänderungen von heute und Preisstatistiken für alle Modelle
+                # in je einer gruppierten Abfrage laden (statt 2 Abfragen pro Modell);
+                # change_day statt DATE(change_date), damit der Index genutzt wird
+                cursor.execute("""
+                    SELECT make, model, change_type, COUNT(*), AVG(price_difference)
+                    FROM price_history 
+                    WHERE change_day = ?
+                    GROUP BY make, model, change_type
+                """, (self._day_key(date_str),))
+                change_details_by_model = {}
+                for make, model, change_type, count, avg_diff in cursor.fetchall():
+                    change_details_by_model.setdefault((make, model), []).append(
+                        (change_type, count, avg_diff)
+                    )
+                
+                cursor.execute("""
+                    SELECT make, model, AVG(price), MIN(price), MAX(price), COUNT(*)
+                    FROM listings 
+                    WHERE is_active = 1 AND price IS NOT NULL
+                    GROUP BY make, model
+                """)
+                price_stats_by_model = {
+                    (row[0], row[1]): tuple(row[2:]) for row in cursor.fetchall()
+                }
+                
                 # Zusammenfassung der Gesamtstatistiken
                 total_models = len(metadata_rows)
                 total_listings = sum(row[3] for row in metadata_rows if row[3])
@@ -643,15 +1163,7 @@ class AutoScoutDatabase:
                         f.write(f"• {make.upper()} {model.upper()}: {changes} Änderungen\n")
                         
                         # Detaillierte Preisänderungen für dieses Modell
-                        cursor.execute("""
-                            SELECT change_type, COUNT(*), AVG(price_difference)
-                            FROM price_history 
-                            WHERE make = ? AND model = ? 
-                            AND DATE(change_date) = DATE('now')
-                            GROUP BY change_type
-                        """, (make, model))
-                        
-                        change_details = cursor.fetchall()
+                        change_details = change_details_by_model.get((make, model), [])
                         for change_type, count, avg_diff in change_details:
                             symbol = "📉" if "GESUNKEN" in change_type else "📈"
                             f.write(f"  {symbol} {count}x {change_type.replace('PREIS_', '').lower()}")
@@ -681,13 +1193,7 @@ class AutoScoutDatabase:
                     f.write(f"\n   🕐 Letztes Update: {last_scrape}\n")
                     
                     # Schnelle Preisstatistiken
-                    cursor.execute("""
-                        SELECT AVG(price), MIN(price), MAX(price), COUNT(*)
-                        FROM listings 
-                        WHERE make = ? AND model = ? AND is_active = 1 AND price IS NOT NULL
-                    """, (make, model))
-                    
-                    price_stats = cursor.fetchone()
+                    price_stats = price_stats_by_model.get((make, model))
                     if price_stats and price_stats[3] > 0:
                         avg_price, min_price, max_price, count = price_stats
                         f.write(f"   💶 Preise: Ø €{avg_price:,.0f} | €{min_price:,.0f} - €{max_price:,.0f}\n")